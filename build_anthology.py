@@ -0,0 +1,294 @@
+# Anthology builder - compiles daily PDFs into one monthly/quarterly PDF
+# Pages are copied from the already-rendered Growth/Daily_Wisdom_*.pdf files,
+# nothing is laid out again except the table of contents and packed days.
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import re
+import sys
+import tempfile
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib import colors
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from compact_archive import ArchiveCompactor
+
+DAILY_PDF_PATTERN = re.compile(r"^Daily_Wisdom_(\d{8})\.pdf$")
+
+
+class AnthologyBuilder:
+    """Merge daily PDFs page-level, caching one compiled segment per month"""
+
+    def __init__(self, growth_folder="Growth", output_folder="anthologies"):
+        self.growth_folder = Path(growth_folder)
+        self.output_folder = Path(output_folder)
+        self.cache_folder = self.output_folder / ".cache"
+        self.cache_folder.mkdir(parents=True, exist_ok=True)
+        self.manifest_file = self.cache_folder / "manifest.json"
+        self.manifest = self.load_manifest()
+        # Days packed by compact_archive.py have no loose PDF - rendered from their bundle
+        self.compactor = ArchiveCompactor(self.growth_folder)
+        self.setup_styles()
+
+    def setup_styles(self):
+        """Styles for the table of contents (matches the daily PDF look)"""
+        self.styles = getSampleStyleSheet()
+        self.styles.add(ParagraphStyle(
+            name='Header',
+            parent=self.styles['Normal'],
+            fontSize=14,
+            textColor=colors.black,
+            spaceAfter=20,
+            alignment=TA_LEFT
+        ))
+        self.styles.add(ParagraphStyle(
+            name='Month',
+            parent=self.styles['Normal'],
+            fontSize=12,
+            textColor=colors.darkblue,
+            spaceBefore=10,
+            spaceAfter=6,
+            alignment=TA_LEFT
+        ))
+        self.styles.add(ParagraphStyle(
+            name='TocEntry',
+            parent=self.styles['Normal'],
+            fontSize=10,
+            textColor=colors.black,
+            leftIndent=12,
+            alignment=TA_LEFT
+        ))
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'segments': {}, 'outputs': {}}
+
+    def save_manifest(self):
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+
+    def find_days(self, start, end):
+        """Days with start <= date <= end (YYYYMMDD strings), sorted by date
+
+        Entries are (date, path) for a loose daily PDF, or (date, None) for a
+        day that only exists packed in Growth/archive/.
+        """
+        days = {}
+        for path in self.growth_folder.glob("Daily_Wisdom_*.pdf"):
+            match = DAILY_PDF_PATTERN.match(path.name)
+            if match and start <= match.group(1) <= end:
+                days[match.group(1)] = path
+        for date in self.compactor.index['days']:
+            if start <= date <= end:
+                days.setdefault(date, None)
+        return sorted(days.items())
+
+    def fingerprint(self, date, path):
+        if path is None:
+            # A fresh render gets a new mtime every time - fingerprint the packed content instead
+            run_time, posts = self.compactor.read_day(date)
+            digest = hashlib.sha256(self.compactor.generator.style_hash().encode('utf-8'))
+            digest.update(run_time.isoformat().encode('utf-8'))
+            for post in posts:
+                digest.update(self.compactor.post_hash(post['content']).encode('utf-8'))
+            return ['packed', digest.hexdigest()]
+        stat = path.stat()
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def update_segment(self, month, month_days):
+        """Bring the cached segment for one month up to date
+
+        Unchanged months are reused as-is, new days at the end of a month are
+        appended to the cached segment, anything else rebuilds just that month.
+        """
+        segment_file = self.cache_folder / f"{month}.pdf"
+        cached = self.manifest['segments'].get(month)
+        current = {date: self.fingerprint(date, path) for date, path in month_days}
+
+        if cached and segment_file.exists():
+            cached_days = cached['days']
+            if cached_days == current:
+                return 'cached'
+            old_dates = list(cached_days)
+            is_append = (
+                all(current.get(date) == cached_days[date] for date in old_dates)
+                and all(date > old_dates[-1] for date in current if date not in cached_days)
+            )
+        else:
+            is_append = False
+
+        if is_append:
+            writer = PdfWriter(clone_from=str(segment_file))
+            pages = dict(cached['pages'])
+            new_days = [(date, path) for date, path in month_days if date not in cached['days']]
+            status = f"appended {len(new_days)} day(s)"
+        else:
+            writer = PdfWriter()
+            pages = {}
+            new_days = month_days
+            status = f"built {len(new_days)} day(s)"
+
+        with tempfile.TemporaryDirectory() as render_folder:
+            for date, path in new_days:
+                if path is None:
+                    # Packed day - render it from its bundle; create_pdf's output line is noise here
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        path, = self.compactor.restore(date, render_folder, formats=("pdf",))
+                reader = PdfReader(str(path))
+                writer.append(reader)
+                pages[date] = len(reader.pages)
+
+            with open(segment_file, 'wb') as f:
+                writer.write(f)
+        self.manifest['segments'][month] = {'days': current, 'pages': pages}
+        return status
+
+    def render_toc(self, title, entries, toc_pages=1):
+        """Render the table of contents; entries are (date, first_page_in_body)"""
+        while True:
+            buffer = BytesIO()
+            doc = SimpleDocTemplate(buffer, pagesize=letter)
+            story = [Paragraph(title, self.styles['Header'])]
+            month = None
+            for date, first_page in entries:
+                day = datetime.strptime(date, "%Y%m%d")
+                if day.strftime("%Y%m") != month:
+                    month = day.strftime("%Y%m")
+                    story.append(Paragraph(day.strftime("%B %Y"), self.styles['Month']))
+                story.append(Paragraph(
+                    f"{day.strftime('%B %d, %Y')} . . . . . page {toc_pages + first_page + 1}",
+                    self.styles['TocEntry']
+                ))
+            doc.build(story)
+            reader = PdfReader(buffer)
+            # Page numbers depend on how long the TOC itself is
+            if len(reader.pages) == toc_pages:
+                return reader
+            toc_pages = len(reader.pages)
+
+    def build(self, name, start, end):
+        """Compile all daily PDFs between start and end into anthologies/Anthology_<name>.pdf"""
+        days = self.find_days(start, end)
+        if not days:
+            print(f"[ERROR] No daily PDFs or packed days found between {start} and {end}")
+            return None
+
+        months = {}
+        for date, path in days:
+            months.setdefault(date[:6], []).append((date, path))
+
+        # Segments always cover whole months so they can be shared between ranges
+        for month in sorted(months):
+            all_month_days = self.find_days(month + "01", month + "31")
+            status = self.update_segment(month, all_month_days)
+            print(f"  [SEGMENT] {month}: {status}")
+
+        output_file = self.output_folder / f"Anthology_{name}.pdf"
+        signature = {
+            'days': [date for date, _ in days],
+            'segments': {month: self.manifest['segments'][month]['days'] for month in months}
+        }
+        if output_file.exists() and self.manifest['outputs'].get(name) == signature:
+            self.save_manifest()
+            print(f"[OK] Anthology up to date: {output_file}")
+            return output_file
+
+        # Locate each requested day inside its month segment
+        entries = []
+        ranges = []
+        body_page = 0
+        for month in sorted(months):
+            segment_pages = self.manifest['segments'][month]['pages']
+            offset = 0
+            first = last = None
+            for date in sorted(segment_pages):
+                if start <= date <= end:
+                    entries.append((date, body_page))
+                    body_page += segment_pages[date]
+                    first = offset if first is None else first
+                    last = offset + segment_pages[date]
+                offset += segment_pages[date]
+            ranges.append((month, first, last))
+
+        title = f"Daily Trading & Life Wisdom - Anthology {name}"
+        toc = self.render_toc(title, entries)
+
+        writer = PdfWriter()
+        writer.append(toc)
+        for month, first, last in ranges:
+            writer.append(str(self.cache_folder / f"{month}.pdf"), pages=(first, last))
+
+        # Bookmarks: one per month, one per day
+        toc_pages = len(toc.pages)
+        month_items = {}
+        for date, first_page in entries:
+            day = datetime.strptime(date, "%Y%m%d")
+            month = date[:6]
+            if month not in month_items:
+                month_items[month] = writer.add_outline_item(day.strftime("%B %Y"), toc_pages + first_page)
+            writer.add_outline_item(day.strftime("%B %d, %Y"), toc_pages + first_page, parent=month_items[month])
+
+        with open(output_file, 'wb') as f:
+            writer.write(f)
+
+        self.manifest['outputs'][name] = signature
+        self.save_manifest()
+        print(f"[OK] Anthology saved: {output_file} ({len(entries)} days, {len(writer.pages)} pages)")
+        return output_file
+
+
+def parse_range(args):
+    """Turn --month / --quarter / --from/--to into (name, start, end)"""
+    if args.month:
+        month = datetime.strptime(args.month, "%Y-%m")
+        return args.month, month.strftime("%Y%m") + "01", month.strftime("%Y%m") + "31"
+    if args.quarter:
+        match = re.match(r"^(\d{4})-Q([1-4])$", args.quarter)
+        if not match:
+            raise ValueError("--quarter must look like 2026-Q1")
+        year, quarter = match.group(1), int(match.group(2))
+        first_month = (quarter - 1) * 3 + 1
+        return args.quarter, f"{year}{first_month:02d}01", f"{year}{first_month + 2:02d}31"
+    start = args.start or "00000000"
+    end = args.end or "99999999"
+    return f"{start}_{end}" if args.start or args.end else "all", start, end
+
+
+def main():
+    """Build or refresh an anthology PDF"""
+    parser = argparse.ArgumentParser(description="Compile daily PDFs into a monthly/quarterly anthology")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--month", help="Month to compile, e.g. 2026-01")
+    group.add_argument("--quarter", help="Quarter to compile, e.g. 2026-Q1")
+    parser.add_argument("--from", dest="start", help="First day (YYYYMMDD)")
+    parser.add_argument("--to", dest="end", help="Last day (YYYYMMDD)")
+    parser.add_argument("--growth-dir", default="Growth", help="Folder with daily PDFs (default: Growth)")
+    parser.add_argument("--output-dir", default="anthologies", help="Output folder (default: anthologies)")
+    args = parser.parse_args()
+
+    try:
+        name, start, end = parse_range(args)
+        builder = AnthologyBuilder(args.growth_dir, args.output_dir)
+        return 0 if builder.build(name, start, end) else 1
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# Archive compactor - packs older days of Growth/ into compressed,
+# content-addressed monthly bundles and renders them back on demand
+import argparse
+import hashlib
+import json
+import sys
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deepseek_python_20251230_c38628 import ContentGenerator, parse_daily_text
+
+
+class ArchiveCompactor:
+    """Monthly zip bundles in Growth/archive/ with one blob per distinct post text
+
+    Bundle layout:
+        posts/<sha256>.txt   post text, stored once per bundle however often it repeats
+        days/<YYYYMMDD>.json run time + list of post hashes
+    archive/index.json maps each packed date to its bundle for random access.
+    """
+
+    def __init__(self, growth_folder="Growth"):
+        self.growth_folder = Path(growth_folder)
+        self.archive_folder = self.growth_folder / "archive"
+        self.index_file = self.archive_folder / "index.json"
+        self.index = self.load_index()
+        self.generator = ContentGenerator(offline=True, output_folder=self.growth_folder)
+
+    def load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'days': {}}
+
+    def save_index(self):
+        self.archive_folder.mkdir(parents=True, exist_ok=True)
+        with open(self.index_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+
+    @staticmethod
+    def post_hash(content):
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def pack_month(self, month, days):
+        """Add days [(date, run_time, posts)] to the bundle for month
+
+        Returns (blobs written, blobs deduplicated).
+        """
+        bundle_file = self.archive_folder / f"{month}.zip"
+        existing = {}
+        if bundle_file.exists():
+            with zipfile.ZipFile(bundle_file) as bundle:
+                existing = {name: bundle.read(name) for name in bundle.namelist()}
+
+        entries = dict(existing)
+        written = deduplicated = 0
+        for date, run_time, posts in days:
+            hashes = []
+            for post in posts:
+                digest = self.post_hash(post['content'])
+                name = f"posts/{digest}.txt"
+                if name in entries:
+                    deduplicated += 1
+                else:
+                    entries[name] = post['content'].encode('utf-8')
+                    written += 1
+                hashes.append(digest)
+            entries[f"days/{date}.json"] = json.dumps({
+                'date': date,
+                'time': run_time.strftime('%Y-%m-%d %H:%M:%S'),
+                'posts': hashes
+            }).encode('utf-8')
+
+        # Re-packing a day (e.g. restored and edited) may orphan blobs - drop them
+        referenced = set()
+        for name, data in entries.items():
+            if name.startswith("days/"):
+                referenced.update(f"posts/{digest}.txt" for digest in json.loads(data)['posts'])
+        entries = {name: data for name, data in entries.items()
+                   if name.startswith("days/") or name in referenced}
+
+        self.archive_folder.mkdir(parents=True, exist_ok=True)
+        tmp_file = bundle_file.with_suffix(".tmp")
+        with zipfile.ZipFile(tmp_file, 'w', compression=zipfile.ZIP_LZMA) as bundle:
+            for name in sorted(entries):
+                bundle.writestr(name, entries[name])
+        tmp_file.replace(bundle_file)
+
+        for date, run_time, _ in days:
+            self.index['days'][date] = {'bundle': bundle_file.name, 'time': run_time.strftime('%H:%M:%S')}
+        return written, deduplicated
+
+    def read_day(self, date):
+        """Random access to one packed day: returns (run_time, posts)"""
+        entry = self.index['days'].get(date)
+        if entry is None:
+            raise KeyError(f"{date} is not in the archive")
+        with zipfile.ZipFile(self.archive_folder / entry['bundle']) as bundle:
+            day = json.loads(bundle.read(f"days/{date}.json"))
+            run_time = datetime.strptime(day['time'], '%Y-%m-%d %H:%M:%S')
+            posts = [{
+                'number': number,
+                'content': bundle.read(f"posts/{digest}.txt").decode('utf-8'),
+                'timestamp': run_time.strftime("%H:%M")
+            } for number, digest in enumerate(day['posts'], 1)]
+        return run_time, posts
+
+    def compact(self, loose_days=30, keep_pdfs=False):
+        """Pack every day older than loose_days, then remove its loose files
+
+        TXT is always packed; PDFs are deleted too unless keep_pdfs, and can
+        be rendered again on demand with restore().
+        """
+        cutoff = (datetime.now() - timedelta(days=loose_days)).strftime("%Y%m%d")
+        size_before = self.disk_usage()
+
+        months = {}
+        for txt_path in sorted(self.growth_folder.glob("Daily_Wisdom_*.txt")):
+            date = txt_path.stem.rsplit("_", 1)[-1]
+            if date >= cutoff:
+                continue
+            # Only drop the TXT if it parses unambiguously and rebuilds byte for byte
+            try:
+                run_time, posts = parse_daily_text(txt_path, len(self.generator.prompts))
+            except ValueError as e:
+                print(f"[WARN] {txt_path.name}: {e}, left loose")
+                continue
+            months.setdefault(date[:6], []).append((date, run_time, posts))
+
+        if not months:
+            print(f"[ARCHIVE] Nothing older than {cutoff} to pack")
+            return 0
+
+        packed = 0
+        for month in sorted(months):
+            written, deduplicated = self.pack_month(month, months[month])
+            # Persist the index before deleting anything
+            self.save_index()
+            for date, _, _ in months[month]:
+                (self.growth_folder / f"Daily_Wisdom_{date}.txt").unlink()
+                pdf_path = self.growth_folder / f"Daily_Wisdom_{date}.pdf"
+                if not keep_pdfs and pdf_path.exists():
+                    pdf_path.unlink()
+            packed += len(months[month])
+            print(f"  [BUNDLE] {month}.zip: {len(months[month])} day(s), "
+                  f"{written} new post blob(s), {deduplicated} deduplicated")
+
+        size_after = self.disk_usage()
+        print(f"[OK] Packed {packed} day(s): {size_before / 1024:.1f} KiB -> {size_after / 1024:.1f} KiB")
+        return packed
+
+    def restore(self, date, output_folder=None, formats=("txt", "pdf"), force=False):
+        """Render a packed day back to loose TXT/PDF (default: into Growth/)
+
+        Refuses to overwrite existing loose files unless force: a loose copy of a
+        packed day is newer than its bundle (e.g. patched by regenerate_posts.py).
+        """
+        run_time, posts = self.read_day(date)
+        generator = (ContentGenerator(offline=True, output_folder=output_folder)
+                     if output_folder else self.generator)
+        existing = [generator.growth_folder / f"Daily_Wisdom_{date}.{fmt}" for fmt in formats]
+        existing = [path.name for path in existing if path.exists()]
+        if existing and not force:
+            raise FileExistsError(f"{', '.join(existing)} already exist and are newer than the archive; "
+                                  f"use --force to overwrite them with the packed version")
+        outputs = []
+        if "txt" in formats:
+            outputs.append(generator.save_as_text(posts, run_time))
+        if "pdf" in formats:
+            outputs.append(generator.create_pdf(posts, run_time))
+        return outputs
+
+    def disk_usage(self):
+        return sum(path.stat().st_size for path in self.growth_folder.rglob("*") if path.is_file())
+
+
+def main():
+    """Compact the archive or render packed days on demand"""
+    parser = argparse.ArgumentParser(description="Pack older days of Growth/ into compressed bundles")
+    parser.add_argument("--growth-dir", default="Growth", help="Archive folder (default: Growth)")
+    parser.add_argument("--loose-days", type=int, default=30,
+                        help="Keep the most recent N days as loose files (default: 30)")
+    parser.add_argument("--keep-pdfs", action="store_true",
+                        help="Keep PDFs of packed days loose instead of rendering on demand")
+    parser.add_argument("--restore", nargs="+", metavar="YYYYMMDD",
+                        help="Render packed days back to loose TXT/PDF instead of compacting")
+    parser.add_argument("--formats", nargs="+", choices=["txt", "pdf"], default=["txt", "pdf"],
+                        help="Formats to render with --restore (default: txt pdf)")
+    parser.add_argument("--output-dir", help="Where --restore writes files (default: --growth-dir)")
+    parser.add_argument("--force", action="store_true",
+                        help="Let --restore overwrite existing loose files (they are newer than the archive)")
+    args = parser.parse_args()
+
+    try:
+        compactor = ArchiveCompactor(args.growth_dir)
+        if args.restore:
+            failures = 0
+            for date in args.restore:
+                try:
+                    compactor.restore(date, args.output_dir, args.formats, args.force)
+                except FileExistsError as e:
+                    failures += 1
+                    print(f"[ERROR] {e}")
+            return 1 if failures else 0
+        compactor.compact(args.loose_days, args.keep_pdfs)
+        return 0
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
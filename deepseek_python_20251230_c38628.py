@@ -3,6 +3,18 @@ import os
 import schedule
 import time
 import json
+import threading
+import argparse
+import codecs
+import hashlib
+import cProfile
+import inspect
+import pstats
+import re
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import requests
@@ -11,22 +23,441 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT
 from reportlab.lib import colors
+from reportlab import Version as REPORTLAB_VERSION
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+
+
+def format_daily_text(posts, run_time):
+    """生成每日TXT的内容（parse_daily_text 的逆操作）"""
+    lines = [
+        "Daily Trading & Life Wisdom\n",
+        f"Date: {run_time.strftime('%Y-%m-%d')}\n",
+        f"Time: {run_time.strftime('%H:%M:%S')}\n",
+        "=" * 60 + "\n\n",
+    ]
+    for post in posts:
+        lines.append(f"{post['number']}. {post['content']}\n\n")
+    return "".join(lines)
+
+
+def parse_daily_text(path, expected_posts):
+    """把 save_as_text 生成的TXT解析回 (生成时间, posts)
+
+    帖子内部也可能有编号列表和空行，"空行 + 序号"的行不一定是新帖子的开始。
+    这里枚举所有能切成恰好 expected_posts 条帖子的方式，只有唯一一种时才接受，
+    并要求结果能逐字还原原文件；否则抛出 ValueError，调用方不应据此覆盖文件。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    header, separator, body = text.partition("=" * 60 + "\n")
+    if not separator:
+        raise ValueError("缺少分隔线")
+
+    fields = dict(re.findall(r"^(Date|Time): (.+)$", header, re.MULTILINE))
+    if 'Date' not in fields or 'Time' not in fields:
+        raise ValueError("缺少 Date/Time 行")
+    run_time = datetime.strptime(f"{fields['Date']} {fields['Time']}", "%Y-%m-%d %H:%M:%S")
+
+    # 候选起始行：前一行为空且以 "N. " 开头
+    lines = body.split("\n")
+    candidates = defaultdict(list)
+    previous_blank = True
+    for index, line in enumerate(lines):
+        match = re.match(r"(\d+)\. ", line)
+        if previous_blank and match and 1 <= int(match.group(1)) <= expected_posts + 1:
+            candidates[int(match.group(1))].append(index)
+        previous_blank = not line.strip()
+
+    # 第1条必须从正文第一个非空行开始
+    first_line = next((i for i, line in enumerate(lines) if line.strip()), None)
+    candidates[1] = [first_line] if first_line in candidates[1] else []
+
+    # ways[n][i]: 第n条帖子从 candidates[n][i] 开始时，后续帖子的切分方式数（最多计到2）
+    ways = {expected_posts: [1] * len(candidates[expected_posts])}
+    for number in range(expected_posts - 1, 0, -1):
+        ways[number] = [
+            min(2, sum(w for start, w in zip(candidates[number + 1], ways[number + 1]) if start > index))
+            for index in candidates[number]
+        ]
+    if not candidates[1] or ways[1][0] != 1:
+        raise ValueError(f"无法唯一切分为 {expected_posts} 条帖子")
+
+    starts = [first_line]
+    for number in range(2, expected_posts + 1):
+        starts.append(next(start for start, w in zip(candidates[number], ways[number])
+                           if start > starts[-1] and w))
+    # 最后一条之后还有下一个序号，说明帖子数可能多于预期
+    if any(start > starts[-1] for start in candidates[expected_posts + 1]):
+        raise ValueError(f"可能多于 {expected_posts} 条帖子")
+    starts.append(len(lines))
+
+    posts = []
+    for number in range(1, expected_posts + 1):
+        chunk = lines[starts[number - 1]:starts[number]]
+        chunk[0] = chunk[0][len(f"{number}. "):]
+        posts.append({
+            'number': number,
+            'content': "\n".join(chunk).strip(),
+            'timestamp': run_time.strftime("%H:%M")
+        })
+
+    if format_daily_text(posts, run_time) != text:
+        raise ValueError("解析结果无法还原原文件")
+    return run_time, posts
+
+def parse_offpeak_window(value):
+    """把 "HH:MM-HH:MM" 解析为 (开始, 结束) 两个 datetime.time，格式不对时抛出 ValueError"""
+    try:
+        start, end = (datetime.strptime(part.strip(), "%H:%M").time() for part in value.split("-"))
+    except ValueError:
+        raise ValueError(f"低峰时段格式应为 HH:MM-HH:MM（如 00:30-08:30）: {value!r}") from None
+    if start == end:
+        raise ValueError(f"低峰时段的开始和结束不能相同: {value!r}")
+    return start, end
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD自适应并发控制器
+
+    请求健康（成功且延迟正常）时加性增加并发上限，遇到429、超时或延迟突增时乘性减小。
+    """
+
+    def __init__(self, initial_limit=2, min_limit=1, max_limit=10,
+                 increase_step=1, decrease_factor=0.5,
+                 latency_threshold=15.0, spike_ratio=2.0, min_latency_samples=5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold  # 绝对延迟上限（秒）
+        self.spike_ratio = spike_ratio              # 相对平均延迟的突增倍数
+        self.min_latency_samples = min_latency_samples  # 样本数足够后才做相对突增判断
+
+        self.limit = max(min_limit, min(max_limit, initial_limit))
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.latency_ewma = None
+        self.latency_samples = 0
+        self.counts = {'ok': 0, 'throttled': 0, 'timeout': 0, 'slow': 0, 'error': 0}
+        self.limit_changes = []
+
+        self._cond = threading.Condition()
+        self._successes_since_change = 0
+        self._last_decrease = 0.0
+
+    def acquire(self):
+        """等待空闲槽位，返回请求开始时间"""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return time.monotonic()
+
+    def release(self, started, outcome):
+        """释放槽位并根据结果调整并发上限
+
+        outcome: 'ok' / 'throttled' / 'timeout' / 'error'
+        """
+        latency = time.monotonic() - started
+        with self._cond:
+            self.in_flight -= 1
+
+            if outcome == 'ok':
+                # 先判断是否突增，再把延迟计入平均值：所有成功请求都参与，
+                # 服务端正常延迟整体上升时基线会跟上，不会一直被判为突增
+                spike = self._is_latency_spike(latency)
+                self._update_latency(latency)
+                if spike:
+                    outcome = 'slow'
+            self.counts[outcome] += 1
+
+            if outcome == 'ok':
+                self._successes_since_change += 1
+                # 每完成一个"窗口"（当前上限个成功请求）才加一，避免过快爬升
+                if self._successes_since_change >= self.limit and self.limit < self.max_limit:
+                    self._set_limit(self.limit + self.increase_step, 'healthy')
+            elif outcome in ('throttled', 'timeout', 'slow'):
+                # 同一拥塞窗口内只减一次：减小之前发出的请求的失败不再重复惩罚
+                if started >= self._last_decrease:
+                    self._last_decrease = time.monotonic()
+                    self._set_limit(int(self.limit * self.decrease_factor), outcome)
+            self._cond.notify_all()
+
+    def metrics(self):
+        """返回当前并发指标"""
+        with self._cond:
+            return {
+                'current_limit': self.limit,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'latency_ewma': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                'counts': dict(self.counts),
+                'limit_changes': list(self.limit_changes),
+            }
+
+    def _is_latency_spike(self, latency):
+        if latency > self.latency_threshold:
+            return True
+        # LLM延迟随输出长度波动很大，样本太少时平均值不可靠
+        if self.latency_samples < self.min_latency_samples:
+            return False
+        return latency > self.latency_ewma * self.spike_ratio
+
+    def _update_latency(self, latency):
+        self.latency_samples += 1
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * latency
+
+    def _set_limit(self, new_limit, reason):
+        new_limit = max(self.min_limit, min(self.max_limit, new_limit))
+        self._successes_since_change = 0
+        if new_limit == self.limit:
+            return
+        self.limit_changes.append({
+            'time': datetime.now().strftime("%H:%M:%S"),
+            'from': self.limit,
+            'to': new_limit,
+            'reason': reason
+        })
+        print(f"  [LIMIT] 并发上限 {self.limit} -> {new_limit} ({reason})")
+        self.limit = new_limit
+
+
+class RunProfiler:
+    """单次运行的性能剖析器
+
+    采集 cProfile 统计、tracemalloc 内存峰值与分配热点，以及 Chrome trace-event
+    格式的分阶段耗时，全部写入每次运行独立的目录。
+    """
+
+    def __init__(self, output_root):
+        self.output_dir = Path(output_root) / datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.events = []
+        self._lock = threading.Lock()
+        self._thread_profiles = []
+        self._profile = None
+        self._t0 = None
+
+    def start(self):
+        """开始采集"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._t0 = time.perf_counter()
+        tracemalloc.start(25)
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    @contextmanager
+    def stage(self, name, **args):
+        """记录一个阶段为 Chrome trace 的完整事件（ph = X）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            with self._lock:
+                self.events.append({
+                    'name': name,
+                    'cat': 'stage',
+                    'ph': 'X',
+                    'ts': round((started - self._t0) * 1e6),
+                    'dur': round((ended - started) * 1e6),
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                    'args': args
+                })
+
+    @contextmanager
+    def profile_thread(self):
+        """在工作线程中单独采集 cProfile，结束时合并到总统计"""
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ 的 cProfile 基于 sys.monitoring，作用于整个解释器：主剖析器已经
+            # 覆盖所有工作线程，而且同一时间只允许一个剖析器。<=3.11 仍需按线程采集再合并
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._thread_profiles.append(profile)
+
+    def stop(self):
+        """停止采集并写出所有产物，返回输出目录"""
+        self._profile.disable()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        # CPU: 原始 pstats 数据 + 可读摘要
+        stats = pstats.Stats(self._profile)
+        for profile in self._thread_profiles:
+            stats.add(profile)
+        stats.dump_stats(str(self.output_dir / "cpu.prof"))
+        with open(self.output_dir / "cpu.txt", 'w', encoding='utf-8') as f:
+            stats.stream = f
+            stats.sort_stats('cumulative').print_stats(40)
+
+        # 内存: 峰值 + 前20个分配位置
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        with open(self.output_dir / "memory.txt", 'w', encoding='utf-8') as f:
+            f.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n\n")
+            f.write("Top allocation sites:\n")
+            for stat in snapshot.statistics('lineno')[:20]:
+                f.write(f"{stat}\n")
+
+        # 分阶段耗时: chrome://tracing 或 https://ui.perfetto.dev 打开
+        with open(self.output_dir / "trace.json", 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+        print(f"[PROFILE] 剖析结果已保存: {self.output_dir} (内存峰值 {peak / 1024:.1f} KiB)")
+        return self.output_dir
+
+
+class CassetteMissError(LookupError):
+    """回放时cassette中没有匹配的请求；不能用备用内容代替，否则回放结果不可信"""
+
+
+class CassetteResponse:
+    """录制/回放时替代 requests.Response 的最小响应对象"""
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class Cassette:
+    """DeepSeek 请求/响应录制与回放
+
+    record 模式保存每次真实请求的参数、状态码、响应分块及其到达时间；
+    replay 模式按请求内容匹配录制结果，不访问网络。
+    pace='fast' 立即返回，pace='recorded' 按录制时的节奏返回。
+    """
+
+    def __init__(self, path, mode, pace='fast'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"未知的cassette模式: {mode}")
+        if pace not in ('fast', 'recorded'):
+            raise ValueError(f"未知的回放速度: {pace}")
+        self.path = Path(path)
+        self.mode = mode
+        self.pace = pace
+        self.interactions = []
+        self._lock = threading.Lock()
+        self._pending = defaultdict(deque)
+
+        self.run_time = None
+        if mode == 'replay':
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.interactions = json.load(f)['interactions']
+            for interaction in self.interactions:
+                self._pending[interaction['key']].append(interaction)
+            # 录制时的运行时间 = 第一个请求发出的时间
+            if self.interactions:
+                self.run_time = datetime.fromtimestamp(min(i['started'] for i in self.interactions))
+
+    @staticmethod
+    def request_key(data):
+        """请求内容的稳定哈希，用于回放时匹配"""
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def record(self, data, send):
+        """执行真实请求并录制；send() 需返回以 stream=True 发出的响应"""
+        interaction = {'key': self.request_key(data), 'request': data, 'started': time.time()}
+        t0 = time.perf_counter()
+        try:
+            response = send()
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            chunks = []
+            for chunk in response.iter_content(chunk_size=None):
+                text = decoder.decode(chunk)
+                if text:
+                    chunks.append({'offset': round(time.perf_counter() - t0, 4), 'data': text})
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                chunks.append({'offset': round(time.perf_counter() - t0, 4), 'data': tail})
+            interaction['status_code'] = response.status_code
+            interaction['chunks'] = chunks
+        except requests.RequestException as e:
+            interaction['error'] = 'timeout' if isinstance(e, requests.Timeout) else type(e).__name__
+            interaction['message'] = str(e)
+            raise
+        finally:
+            interaction['latency'] = round(time.perf_counter() - t0, 4)
+            with self._lock:
+                self.interactions.append(interaction)
+
+        return CassetteResponse(interaction['status_code'], ''.join(c['data'] for c in chunks))
+
+    def play(self, data):
+        """返回与请求匹配的录制响应（同一请求多次录制时按顺序返回）"""
+        key = self.request_key(data)
+        with self._lock:
+            if not self._pending[key]:
+                raise CassetteMissError(f"cassette中没有匹配的请求: {self.path.name} ({key[:12]})")
+            interaction = self._pending[key].popleft()
+
+        if self.pace == 'recorded':
+            time.sleep(interaction['latency'])
+
+        if 'error' in interaction:
+            if interaction['error'] == 'timeout':
+                raise requests.Timeout(interaction['message'])
+            raise requests.ConnectionError(interaction['message'])
+        return CassetteResponse(interaction['status_code'],
+                                ''.join(c['data'] for c in interaction['chunks']))
+
+    def save(self):
+        """写出录制结果"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            interactions = sorted(self.interactions, key=lambda i: i['started'])
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'recorded_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'interactions': interactions
+            }, f, ensure_ascii=False, indent=2)
+        print(f"[CASSETTE] 已录制 {len(interactions)} 个请求: {self.path}")
+        return self.path
+
+
 class ContentGenerator:
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, profile=False, record=False, replay=None,
+                 replay_pace='fast', output_folder=None, offline=False,
+                 queue_days=0, offpeak_window="00:30-08:30"):
         """初始化内容生成器"""
         # 设置DeepSeek API密钥
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
-        if not self.api_key:
+        # offline: 只做本地渲染（重新生成PDF等），不调用API
+        if not self.api_key and not replay and not offline:
             raise ValueError("请设置DEEPSEEK_API_KEY环境变量或传入api_key参数")
         
-        # 创建Growth文件夹
-        self.growth_folder = Path("Growth")
-        self.growth_folder.mkdir(exist_ok=True)
+        # 录制/回放（--record / --replay）：回放时不访问网络
+        self.record = record
+        self.cassette_folder = Path("cassettes")
+        self.cassette = Cassette(replay, 'replay', replay_pace) if replay else None
+
+        # 创建Growth文件夹；回放结果默认写到 replay_out/，不能覆盖真实输出
+        self.growth_folder = Path(output_folder or ("replay_out" if replay else "Growth"))
+        if replay and self.growth_folder.resolve() == Path("Growth").resolve():
+            raise ValueError("回放不能写入 Growth/，请用 --output-dir 指定其他文件夹")
+        self.growth_folder.mkdir(parents=True, exist_ok=True)
         
         # 设置提示模板 - A/B FORMAT VARIATION SYSTEM
         # Strategy: 5 core financial ideas × 2 different formats = 10 posts with variety
@@ -69,9 +500,62 @@ class ContentGenerator:
             "Create a comparison showing the financial impact of peer groups using numbers. Format: 'If your 5 closest friends [average $50K income and spend it all], you'll likely [earn $50K and stay broke]. If your 5 closest friends [average $150K income and invest 30%], you'll likely [level up to 6 figures and build wealth].' Show the math. End with 'You become the average of your circle.'"
         ]
         
+        # 性能剖析（--profile）：每次运行的结果保存在 profiles/ 下独立目录
+        self.profile = profile
+        self.profile_folder = Path("profiles")
+        self.profiler = None
+
+        # 预生成队列：低峰时段提前生成 queue_days 天的内容，发布时直接读取
+        if replay and queue_days:
+            # 队列在所有运行之间共享，回放既不能消耗也不能补充真实的待发布内容
+            raise ValueError("回放不能使用预生成队列（queue_days）")
+        self.queue_days = queue_days
+        if isinstance(offpeak_window, str):
+            offpeak_window = parse_offpeak_window(offpeak_window)
+        self.offpeak_window = offpeak_window
+        self.queue_folder = Path("queue")
+
+        # 自适应并发控制：从上次运行学到的上限开始
+        self.concurrency_state_file = self.growth_folder / ".concurrency_state.json"
+        self.limiter = AdaptiveConcurrencyLimiter(initial_limit=self.load_concurrency_limit())
+        # 429/超时的请求在上限减小后重新排队重试，重试用尽才使用备用内容
+        self.max_retries = 3
+        self.retry_backoff = 1.0
+
         # 设置PDF样式
         self.setup_styles()
+
+    def load_concurrency_limit(self, default=2):
+        """读取上次运行结束时的并发上限"""
+        try:
+            with open(self.concurrency_state_file, 'r', encoding='utf-8') as f:
+                return int(json.load(f)['current_limit'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return default
+
+    def save_concurrency_metrics(self):
+        """保存并发指标，供下次运行和排查使用"""
+        metrics = self.limiter.metrics()
+        metrics['date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if self.is_replay():
+            # 回放的延迟不是真实网络延迟，不能作为下次运行的起点
+            return metrics
+        try:
+            with open(self.concurrency_state_file, 'w', encoding='utf-8') as f:
+                json.dump(metrics, f, indent=2)
+        except OSError as e:
+            print(f"[WARN] 无法保存并发指标: {e}")
+        return metrics
     
+    def is_replay(self):
+        return self.cassette is not None and self.cassette.mode == 'replay'
+
+    def trace_stage(self, name, **args):
+        """返回阶段计时上下文；未开启剖析时为空操作"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name, **args)
+
     def setup_styles(self):
         """设置PDF样式"""
         self.styles = getSampleStyleSheet()
@@ -161,42 +645,91 @@ Write like this - specific, educational, aspirational, with real numbers."""
                 "max_tokens": 400,
                 "stream": False
             }
-            
-            response = requests.post(
-                "https://api.deepseek.com/v1/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content'].strip()
-                # 清理内容：去除引号、多余空格
-                content = content.replace('"', '').replace("'", '').strip()
-                return content
+
+            for attempt in range(self.max_retries + 1):
+                # 通过自适应并发控制器限制同时进行的请求数；重试同样要重新排队
+                with self.trace_stage('limiter_wait'):
+                    started = self.limiter.acquire()
+                outcome = 'error'
+                try:
+                    with self.trace_stage('call_deepseek_api', prompt=prompt[:40]):
+                        response = self.post_chat_completion(headers, data)
+                    if response.status_code == 200:
+                        outcome = 'ok'
+                    elif response.status_code == 429:
+                        outcome = 'throttled'
+                except requests.Timeout as e:
+                    outcome = 'timeout'
+                    error = e
+                finally:
+                    self.limiter.release(started, outcome)
+
+                if outcome == 'ok':
+                    result = response.json()
+                    content = result['choices'][0]['message']['content'].strip()
+                    # 清理内容：去除引号、多余空格
+                    content = content.replace('"', '').replace("'", '').strip()
+                    return content
+                if outcome == 'error' or attempt == self.max_retries:
+                    break
+                # 429/超时说明并发过高：上限已经减小，退避后按新上限重试
+                print(f"  [RETRY] {outcome}，第 {attempt + 1}/{self.max_retries} 次重试")
+                if not (self.is_replay() and self.cassette.pace == 'fast'):
+                    time.sleep(self.retry_backoff * 2 ** attempt)
+
+            if outcome == 'timeout':
+                print(f"API调用异常: {error}")
             else:
                 print(f"API错误: {response.status_code}")
-                return None
-                
+            return None
+
+        except CassetteMissError:
+            # 回放未命中必须让整次运行失败，不能悄悄混入备用内容
+            raise
         except Exception as e:
             print(f"API调用异常: {e}")
             return None
-    
+
+    def post_chat_completion(self, headers, data):
+        """发送请求；开启录制或回放时经由 cassette"""
+        if self.cassette is None:
+            return requests.post(DEEPSEEK_API_URL, headers=headers, json=data, timeout=30)
+        if self.cassette.mode == 'replay':
+            return self.cassette.play(data)
+        return self.cassette.record(data, lambda: requests.post(
+            DEEPSEEK_API_URL, headers=headers, json=data, timeout=30, stream=True))
+
     def generate_daily_posts(self):
         """生成10条每日内容"""
         print(f"\n{'='*60}")
         print(f"开始生成内容 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}")
-        
-        posts = []
-        
-        for i, prompt in enumerate(self.prompts, 1):
-            print(f"生成第 {i}/10 条内容...")
-            
-            content = self.call_deepseek_api(prompt)
-            
-            if content:
+
+        # 并发生成，实际同时进行的请求数由 self.limiter 动态控制
+        with self.trace_stage('generate_daily_posts'):
+            with ThreadPoolExecutor(max_workers=self.limiter.max_limit) as executor:
+                posts = list(executor.map(self.generate_post, range(1, len(self.prompts) + 1), self.prompts))
+
+        metrics = self.save_concurrency_metrics()
+        print(f"\n[OK] 成功生成 {len(posts)} 条内容")
+        print(f"[LIMIT] 当前并发上限: {metrics['current_limit']} "
+              f"(峰值并发 {metrics['peak_in_flight']}, 结果统计 {metrics['counts']})")
+        return posts
+
+    def generate_post(self, i, prompt):
+        """生成单条内容，API失败时使用备用内容"""
+        if self.profiler is None:
+            return self._generate_post(i, prompt)
+        with self.profiler.profile_thread(), self.trace_stage('generate_post', post=i):
+            return self._generate_post(i, prompt)
+
+    def _generate_post(self, i, prompt):
+        print(f"生成第 {i}/{len(self.prompts)} 条内容...")
+
+        content = self.call_deepseek_api(prompt)
+
+        if content:
+            with self.trace_stage('postprocess', post=i):
                 # Allow longer content for matrix/framework formats, but cap others
                 word_count = len(content.split())
                 # If it's a matrix format (contains multiple lines or "="), allow up to 200 words
@@ -209,38 +742,33 @@ Write like this - specific, educational, aspirational, with real numbers."""
                     words = content.split()[:max_words]
                     content = ' '.join(words) + "..."
 
-                post_item = {
-                    'number': i,
-                    'content': content,
-                    'timestamp': datetime.now().strftime("%H:%M")
-                }
-                posts.append(post_item)
-                # Safe print with encoding handling
-                try:
-                    print(f"  [OK] {content[:50]}...")
-                except UnicodeEncodeError:
-                    print(f"  [OK] Content generated successfully (Post #{i})")
-            else:
-                # 如果API失败，使用备用内容
-                backup_content = self.get_backup_content(i)
-                post_item = {
-                    'number': i,
-                    'content': backup_content,
-                    'timestamp': datetime.now().strftime("%H:%M"),
-                    'backup': True
-                }
-                posts.append(post_item)
-                # Safe print with encoding handling
-                try:
-                    print(f"  [BACKUP] 使用备用内容: {backup_content[:50]}...")
-                except UnicodeEncodeError:
-                    print(f"  [BACKUP] Using backup content (Post #{i})")
-            
-            time.sleep(1)  # 避免API速率限制
-        
-        print(f"\n[OK] 成功生成 {len(posts)} 条内容")
-        return posts
-    
+            post_item = {
+                'number': i,
+                'content': content,
+                'timestamp': datetime.now().strftime("%H:%M")
+            }
+            # Safe print with encoding handling
+            try:
+                print(f"  [OK] {content[:50]}...")
+            except UnicodeEncodeError:
+                print(f"  [OK] Content generated successfully (Post #{i})")
+        else:
+            # 如果API失败，使用备用内容
+            backup_content = self.get_backup_content(i)
+            post_item = {
+                'number': i,
+                'content': backup_content,
+                'timestamp': datetime.now().strftime("%H:%M"),
+                'backup': True
+            }
+            # Safe print with encoding handling
+            try:
+                print(f"  [BACKUP] 使用备用内容: {backup_content[:50]}...")
+            except UnicodeEncodeError:
+                print(f"  [BACKUP] Using backup content (Post #{i})")
+
+        return post_item
+
     def get_backup_content(self, index):
         """获取备用内容（当API失败时使用）- A/B Format Variations"""
         backup_contents = [
@@ -276,10 +804,71 @@ Write like this - specific, educational, aspirational, with real numbers."""
         ]
         return backup_contents[index % len(backup_contents)]
     
-    def create_pdf(self, posts):
-        """创建PDF文件"""
+    def is_backup_content(self, content):
+        """TXT中不保存备用标记，按备用内容原文识别"""
+        return any(content == self.get_backup_content(k) for k in range(len(self.prompts)))
+
+    def regenerate_posts(self, date_str, numbers=None):
+        """重新生成某天的指定帖子（默认：所有备用内容），原地更新TXT和PDF
+
+        只为指定帖子调用API并使用原始提示词，其余帖子保持不变；
+        重新生成失败的帖子保留原内容。返回实际替换的帖子数。
+        """
+        txt_file = self.growth_folder / f"Daily_Wisdom_{date_str}.txt"
+        if txt_file.exists():
+            # 解析必须唯一且能逐字还原原文件，否则改写会破坏其他帖子：放弃这一天
+            try:
+                run_time, posts = parse_daily_text(txt_file, len(self.prompts))
+            except ValueError as e:
+                print(f"[ERROR] {txt_file.name}: {e}，未做任何修改")
+                return 0
+        else:
+            # 已被 compact_archive.py 打包的日期直接从归档读取；修改后写回散文件，下次压缩时重新打包
+            from compact_archive import ArchiveCompactor  # compact_archive 导入本模块，只能延迟导入
+            compactor = ArchiveCompactor(self.growth_folder)
+            if date_str not in compactor.index['days']:
+                print(f"[ERROR] 找不到 {txt_file}，归档中也没有 {date_str}")
+                return 0
+            run_time, posts = compactor.read_day(date_str)
+        if numbers is None:
+            numbers = [post['number'] for post in posts if self.is_backup_content(post['content'])]
+        invalid = [n for n in numbers if not 1 <= n <= min(len(posts), len(self.prompts))]
+        if invalid:
+            print(f"[ERROR] {date_str} 没有这些帖子: {invalid}")
+            return 0
+        if not numbers:
+            print(f"[OK] {date_str} 没有需要重新生成的帖子")
+            return 0
+
+        print(f"[REGEN] {date_str}: 重新生成第 {', '.join(map(str, numbers))} 条")
+        with ThreadPoolExecutor(max_workers=self.limiter.max_limit) as executor:
+            new_posts = list(executor.map(self.generate_post, numbers, [self.prompts[n - 1] for n in numbers]))
+
+        replaced = 0
+        for post in new_posts:
+            if post.get('backup'):
+                print(f"  [KEEP] 第 {post['number']} 条重新生成失败，保留原内容")
+                continue
+            posts[post['number'] - 1] = post
+            replaced += 1
+
+        if replaced:
+            self.save_as_text(posts, run_time)
+            self.create_pdf(posts, run_time)
+        self.save_concurrency_metrics()
+        print(f"[OK] {date_str}: 替换 {replaced}/{len(numbers)} 条")
+        return replaced
+
+    def style_hash(self):
+        """PDF样式/排版代码的指纹，样式改动后旧PDF即视为过期"""
+        source = inspect.getsource(ContentGenerator.setup_styles) + inspect.getsource(ContentGenerator.create_pdf)
+        return hashlib.sha256((source + REPORTLAB_VERSION).encode('utf-8')).hexdigest()
+
+    def create_pdf(self, posts, run_time=None):
+        """创建PDF文件（run_time 默认为当前时间）"""
+        run_time = run_time or datetime.now()
         # 生成文件名
-        date_str = datetime.now().strftime("%Y%m%d")
+        date_str = run_time.strftime("%Y%m%d")
         filename = self.growth_folder / f"Daily_Wisdom_{date_str}.pdf"
         
         # 创建PDF文档
@@ -287,9 +876,9 @@ Write like this - specific, educational, aspirational, with real numbers."""
         story = []
         
         # 添加标题
-        title = f"Daily Trading & Life Wisdom - {datetime.now().strftime('%B %d, %Y')}"
+        title = f"Daily Trading & Life Wisdom - {run_time.strftime('%B %d, %Y')}"
         story.append(Paragraph(title, self.styles['Header']))
-        story.append(Paragraph(f"Generated at: {datetime.now().strftime('%H:%M:%S')}", self.styles['TimeStamp']))
+        story.append(Paragraph(f"Generated at: {run_time.strftime('%H:%M:%S')}", self.styles['TimeStamp']))
         
         # 添加内容，每条之间用分页符分隔
         for i, post in enumerate(posts):
@@ -302,38 +891,68 @@ Write like this - specific, educational, aspirational, with real numbers."""
                 story.append(PageBreak())
         
         # 生成PDF
-        doc.build(story)
+        with self.trace_stage('create_pdf', posts=len(posts)):
+            doc.build(story)
         print(f"[OK] PDF已保存: {filename}")
         return filename
     
-    def save_as_text(self, posts):
+    def save_as_text(self, posts, run_time=None):
         """同时保存为文本文件（备用）"""
-        date_str = datetime.now().strftime("%Y%m%d")
+        run_time = run_time or datetime.now()
+        date_str = run_time.strftime("%Y%m%d")
         filename = self.growth_folder / f"Daily_Wisdom_{date_str}.txt"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(f"Daily Trading & Life Wisdom\n")
-            f.write(f"Date: {datetime.now().strftime('%Y-%m-%d')}\n")
-            f.write(f"Time: {datetime.now().strftime('%H:%M:%S')}\n")
-            f.write("=" * 60 + "\n\n")
-            
-            for post in posts:
-                f.write(f"{post['number']}. {post['content']}\n\n")
+        with self.trace_stage('save_as_text', posts=len(posts)), open(filename, 'w', encoding='utf-8') as f:
+            f.write(format_daily_text(posts, run_time))
         
         print(f"[OK] 文本备份已保存: {filename}")
+        return filename
     
-    def run_daily_generation(self):
-        """运行每日生成任务"""
+    def run_daily_generation(self, use_queue=True):
+        """运行每日生成任务
+
+        use_queue=False 时不消耗预生成队列（启动时的测试运行）。
+        """
+        return self.run_instrumented(self._run_daily_generation, use_queue)
+
+    def run_instrumented(self, task, *args):
+        """执行任务，按需录制（--record）和剖析（--profile）"""
+        if self.record:
+            # 每次运行单独一个cassette文件
+            cassette_file = self.cassette_folder / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            self.cassette = Cassette(cassette_file, 'record')
         try:
-            # 生成内容
-            posts = self.generate_daily_posts()
+            if not self.profile:
+                return task(*args)
+
+            self.profiler = RunProfiler(self.profile_folder)
+            self.profiler.start()
+            try:
+                return task(*args)
+            finally:
+                self.profiler.stop()
+                self.profiler = None
+        finally:
+            if self.record:
+                self.cassette.save()
+                self.cassette = None
+
+    def _run_daily_generation(self, use_queue=True):
+        try:
+            # 生成内容：优先使用预生成队列（无网络请求），队列为空时实时生成
+            posts = self.take_from_queue() if self.queue_days and use_queue else None
+            if posts is None:
+                posts = self.generate_daily_posts()
+
+            # 回放时输出使用录制当天的日期和时间
+            run_time = self.cassette.run_time if self.is_replay() else None
             
             if posts:
                 # 创建PDF
-                pdf_file = self.create_pdf(posts)
+                pdf_file = self.create_pdf(posts, run_time)
                 
                 # 保存文本备份
-                self.save_as_text(posts)
+                self.save_as_text(posts, run_time)
                 
                 # 打印摘要
                 print(f"\n{'='*60}")
@@ -351,6 +970,89 @@ Write like this - specific, educational, aspirational, with real numbers."""
             print(f"[ERROR] 生成过程中出现错误: {e}")
             return False
     
+    def in_offpeak_window(self, now=None):
+        """当前时间是否在低峰时段内（支持跨午夜，如 22:00-06:00）"""
+        now = (now or datetime.now()).time()
+        start, end = self.offpeak_window
+        if start < end:
+            return start <= now < end
+        return now >= start or now < end
+
+    def offpeak_label(self):
+        start, end = self.offpeak_window
+        return f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
+
+    def queued_days(self):
+        """已就绪的预生成内容，按生成时间排序（先进先出）"""
+        return sorted(self.queue_folder.glob("ready_*.json"))
+
+    def refill_queue(self, force=False):
+        """在低峰时段补足队列到 queue_days 天，只补已被使用的部分"""
+        if not force and not self.in_offpeak_window():
+            print(f"[QUEUE] 不在低峰时段 {self.offpeak_label()}，跳过预生成")
+            return 0
+        if len(self.queued_days()) >= self.queue_days:
+            print(f"[QUEUE] 队列已满 ({self.queue_days} 天)")
+            return 0
+        return self.run_instrumented(self._refill_queue, force)
+
+    def _refill_queue(self, force, max_attempts=3):
+        self.queue_folder.mkdir(parents=True, exist_ok=True)
+        missing = self.queue_days - len(self.queued_days())
+        print(f"[QUEUE] 队列中 {self.queue_days - missing}/{self.queue_days} 天，需要预生成 {missing} 天")
+
+        added = 0
+        while added < missing:
+            posts = self.generate_daily_posts()
+            backups = [post['number'] for post in posts if post.get('backup')]
+
+            # 不把API失败的备用内容锁进队列：低峰时段内只重试这几条
+            attempts = 1
+            while backups and attempts < max_attempts and (force or self.in_offpeak_window()):
+                print(f"[QUEUE] 第 {', '.join(map(str, backups))} 条使用了备用内容，重试 ({attempts}/{max_attempts - 1})")
+                with ThreadPoolExecutor(max_workers=self.limiter.max_limit) as executor:
+                    retried = list(executor.map(self.generate_post, backups, [self.prompts[n - 1] for n in backups]))
+                for post in retried:
+                    if not post.get('backup'):
+                        posts[post['number'] - 1] = post
+                backups = [post['number'] for post in posts if post.get('backup')]
+                attempts += 1
+
+            if backups:
+                # 这一天不加入队列，等下次检查（仍在低峰时段内时）再补
+                print(f"[QUEUE] 第 {', '.join(map(str, backups))} 条仍为备用内容，停止预生成，已加入 {added}/{missing} 天")
+                break
+
+            generated_at = datetime.now()
+            filename = self.queue_folder / f"ready_{generated_at.strftime('%Y%m%d_%H%M%S_%f')}.json"
+            # 先写临时文件再改名，发布端不会读到写了一半的文件
+            tmp_file = filename.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'generated_at': generated_at.strftime('%Y-%m-%d %H:%M:%S'), 'posts': posts},
+                          f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, filename)
+            print(f"[QUEUE] 已加入队列: {filename}")
+            added += 1
+        return added
+
+    def take_from_queue(self):
+        """取出最早的一天内容；队列为空时返回None"""
+        for filename in self.queued_days():
+            taken = filename.with_suffix(".taken")
+            try:
+                # 改名即占用，避免与并发的发布任务重复使用
+                os.replace(filename, taken)
+            except FileNotFoundError:
+                continue
+            with open(taken, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            taken.unlink()
+            print(f"[QUEUE] 使用预生成内容 ({entry['generated_at']})，剩余 {len(self.queued_days())} 天")
+            return entry['posts']
+
+        print("[QUEUE] 队列为空，改为实时生成")
+        return None
+
     def setup_scheduler(self, run_time="17:00"):
         """设置定时调度器"""
         print(f"\n[TIMER] 定时任务设置")
@@ -360,10 +1062,14 @@ Write like this - specific, educational, aspirational, with real numbers."""
         
         # 设置定时任务
         schedule.every().day.at(run_time).do(self.run_daily_generation)
+        if self.queue_days:
+            # 低峰时段内每30分钟检查一次队列，补足已使用的天数
+            print(f"预生成队列: {self.queue_days} 天，低峰时段 {self.offpeak_label()}")
+            schedule.every(30).minutes.do(self.refill_queue)
         
-        # 立即运行一次（测试）
+        # 立即运行一次（测试），不消耗预生成队列
         print("正在进行首次运行测试...")
-        self.run_daily_generation()
+        self.run_daily_generation(use_queue=False)
         
         # 保持程序运行
         while True:
@@ -372,6 +1078,21 @@ Write like this - specific, educational, aspirational, with real numbers."""
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="自动内容生成系统")
+    parser.add_argument("--profile", action="store_true",
+                        help="剖析每次运行（cProfile、tracemalloc、Chrome trace），结果保存到 profiles/")
+    parser.add_argument("--record", action="store_true",
+                        help="录制每次运行的API请求/响应到 cassettes/")
+    parser.add_argument("--queue-days", type=int, default=0,
+                        help="低峰时段提前生成N天内容，定时任务从队列发布（默认0：不使用队列）")
+    parser.add_argument("--offpeak", default="00:30-08:30",
+                        help="低峰时段，如 00:30-08:30（默认）")
+    args = parser.parse_args()
+    try:
+        offpeak_window = parse_offpeak_window(args.offpeak)
+    except ValueError as e:
+        parser.error(str(e))
+
     print("="*60)
     print("自动内容生成系统 v1.0")
     print("="*60)
@@ -386,13 +1107,14 @@ def main():
         return
     
     # 创建生成器实例
-    generator = ContentGenerator(api_key)
+    generator = ContentGenerator(api_key, profile=args.profile, record=args.record,
+                                 queue_days=args.queue_days, offpeak_window=offpeak_window)
     
     # 先进行测试运行
     print("\n" + "="*60)
     print("正在进行测试运行...")
     print("="*60)
-    generator.run_daily_generation()
+    generator.run_daily_generation(use_queue=False)
     
     # 然后设置定时任务（每天17:00）
     print("\n" + "="*60)
@@ -0,0 +1,79 @@
+# Selective regeneration - re-generates individual posts of an existing day
+# and patches its TXT/PDF in place, one API call per post (packed days included)
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from compact_archive import ArchiveCompactor
+from deepseek_python_20251230_c38628 import ContentGenerator
+
+
+def date_range(start, end):
+    """YYYYMMDD strings from start to end inclusive"""
+    day = datetime.strptime(start, "%Y%m%d")
+    last = datetime.strptime(end, "%Y%m%d")
+    while day <= last:
+        yield day.strftime("%Y%m%d")
+        day += timedelta(days=1)
+
+
+def main():
+    """Regenerate selected posts"""
+    parser = argparse.ArgumentParser(description="Regenerate individual posts of existing days")
+    parser.add_argument("--date", help="Day to patch (YYYYMMDD)")
+    parser.add_argument("--posts", type=int, nargs="+", help="Post numbers to regenerate, e.g. --posts 3 7")
+    parser.add_argument("--backup", action="store_true",
+                        help="Regenerate every post that used backup content")
+    parser.add_argument("--from", dest="start", help="First day for --backup (YYYYMMDD)")
+    parser.add_argument("--to", dest="end", help="Last day for --backup (YYYYMMDD)")
+    parser.add_argument("--output-dir", default="Growth", help="Archive folder (default: Growth)")
+    args = parser.parse_args()
+
+    if args.backup == bool(args.posts):
+        print("[ERROR] Use either --posts N [N ...] or --backup")
+        return 1
+    if args.posts and not args.date:
+        print("[ERROR] --posts needs --date YYYYMMDD")
+        return 1
+
+    api_key = os.getenv("DEEPSEEK_API_KEY")
+
+    if not api_key:
+        print("[ERROR] DEEPSEEK_API_KEY not found in .env file")
+        return 1
+
+    try:
+        generator = ContentGenerator(api_key, output_folder=args.output_dir)
+        if args.posts:
+            generator.regenerate_posts(args.date, sorted(set(args.posts)))
+            return 0
+
+        # Packed days (compact_archive.py) are read from their bundle and written back loose
+        packed = ArchiveCompactor(generator.growth_folder).index['days']
+        start = args.start or args.date
+        end = args.end or args.date or datetime.now().strftime("%Y%m%d")
+        if not start:
+            print("[ERROR] --backup needs --date or --from/--to")
+            return 1
+        total = 0
+        for date_str in date_range(start, end):
+            if (generator.growth_folder / f"Daily_Wisdom_{date_str}.txt").exists() or date_str in packed:
+                total += generator.regenerate_posts(date_str)
+        print(f"[OK] Replaced {total} backup posts between {start} and {end}")
+        return 0
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,116 @@
+# Bulk re-render - rebuilds the Growth/ PDFs from their TXT sources with the
+# current setup_styles(), without calling the API
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# Add current directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from deepseek_python_20251230_c38628 import ContentGenerator, parse_daily_text
+
+# One offline generator per worker process, created by the pool initializer
+_generator = None
+
+
+def _init_worker(growth_folder):
+    global _generator
+    _generator = ContentGenerator(offline=True, output_folder=growth_folder)
+
+
+def _render(txt_path):
+    """Parse one TXT and rebuild its PDF; returns (txt name, post count)"""
+    # Raises ValueError for files that do not parse unambiguously - reported as failures
+    run_time, posts = parse_daily_text(txt_path, len(_generator.prompts))
+    # create_pdf prints one line per file - too noisy for hundreds of days
+    with contextlib.redirect_stdout(io.StringIO()):
+        _generator.create_pdf(posts, run_time)
+    return Path(txt_path).name, len(posts)
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def rerender_archive(growth_folder="Growth", workers=None, force=False):
+    """Re-render every stale Daily_Wisdom_*.txt in growth_folder across a process pool"""
+    growth_folder = Path(growth_folder)
+    state_file = growth_folder / ".render_state.json"
+    style_hash = ContentGenerator(offline=True, output_folder=growth_folder).style_hash()
+
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    # Any style change invalidates every file
+    rendered = state.get('files', {}) if state.get('style_hash') == style_hash else {}
+
+    stale = []
+    sources = {}
+    for txt_path in sorted(growth_folder.glob("Daily_Wisdom_*.txt")):
+        sources[txt_path.name] = file_hash(txt_path)
+        pdf_path = txt_path.with_suffix(".pdf")
+        if force or rendered.get(txt_path.name) != sources[txt_path.name] or not pdf_path.exists():
+            stale.append(txt_path)
+
+    skipped = len(sources) - len(stale)
+    print(f"[RERENDER] {len(stale)} stale, {skipped} up to date (style {style_hash[:12]})")
+    if not stale:
+        return 0
+
+    started = time.perf_counter()
+    failures = 0
+    total_posts = 0
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(growth_folder),)) as executor:
+        futures = {executor.submit(_render, str(path)): path for path in stale}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                name, post_count = future.result()
+                rendered[name] = sources[name]
+                total_posts += post_count
+            except Exception as e:
+                failures += 1
+                rendered.pop(path.name, None)
+                print(f"[ERROR] {path.name}: {e}")
+    elapsed = time.perf_counter() - started
+
+    # Forget files that no longer exist
+    rendered = {name: digest for name, digest in rendered.items() if name in sources}
+    with open(state_file, 'w', encoding='utf-8') as f:
+        json.dump({'style_hash': style_hash, 'files': rendered}, f, indent=2)
+
+    done = len(stale) - failures
+    print(f"[OK] Re-rendered {done} PDFs ({total_posts} posts) in {elapsed:.2f}s "
+          f"with {workers} workers: {done / elapsed:.1f} files/s, {total_posts / elapsed:.1f} posts/s")
+    return failures
+
+
+def main():
+    """Re-render stale PDFs"""
+    parser = argparse.ArgumentParser(description="Rebuild Growth/ PDFs from TXT sources with the current styles")
+    parser.add_argument("--growth-dir", default="Growth", help="Archive folder (default: Growth)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-render even if nothing changed")
+    args = parser.parse_args()
+
+    try:
+        return 1 if rerender_archive(args.growth_dir, args.workers, args.force) else 0
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 # This runs once and exits - perfect for scheduled tasks
 import os
 import sys
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -11,19 +12,61 @@ load_dotenv()
 # Add current directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from deepseek_python_20251230_c38628 import ContentGenerator
+from deepseek_python_20251230_c38628 import ContentGenerator, parse_offpeak_window
 
 def main():
     """Run daily generation once"""
+    parser = argparse.ArgumentParser(description="Run daily generation once")
+    parser.add_argument("--profile", action="store_true",
+                        help="Save CPU, memory and per-stage trace profiles to profiles/<run>/")
+    parser.add_argument("--record", action="store_true",
+                        help="Record every API request/response to cassettes/<run>.json")
+    parser.add_argument("--replay", metavar="CASSETTE",
+                        help="Serve API calls from a recorded cassette (no network)")
+    parser.add_argument("--replay-pace", choices=["fast", "recorded"], default="fast",
+                        help="Replay instantly or at the recorded pace (default: fast)")
+    parser.add_argument("--output-dir",
+                        help="Folder for PDF/TXT outputs (default: Growth, or replay_out with --replay)")
+    parser.add_argument("--queue-days", type=int, default=0,
+                        help="Publish from the pre-generation queue holding N days (default: 0, generate live)")
+    parser.add_argument("--pregenerate", action="store_true",
+                        help="Only refill the queue up to --queue-days days, then exit")
+    parser.add_argument("--offpeak", default="00:30-08:30",
+                        help="Off-peak window for --pregenerate (default: 00:30-08:30)")
+    parser.add_argument("--ignore-window", action="store_true",
+                        help="Pre-generate even outside the off-peak window")
+    args = parser.parse_args()
+    try:
+        offpeak_window = parse_offpeak_window(args.offpeak)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.record and args.replay:
+        print("[ERROR] --record and --replay cannot be used together")
+        return 1
+    if args.replay and args.queue_days:
+        print("[ERROR] --replay and --queue-days cannot be used together")
+        return 1
+    if args.pregenerate and args.queue_days < 1:
+        print("[ERROR] --pregenerate needs --queue-days N")
+        return 1
+
     api_key = os.getenv("DEEPSEEK_API_KEY")
 
-    if not api_key:
+    if not api_key and not args.replay:
         print("[ERROR] DEEPSEEK_API_KEY not found in .env file")
         return 1
 
     try:
-        generator = ContentGenerator(api_key)
-        generator.run_daily_generation()
+        generator = ContentGenerator(api_key, profile=args.profile, record=args.record,
+                                     replay=args.replay, replay_pace=args.replay_pace,
+                                     output_folder=args.output_dir,
+                                     queue_days=args.queue_days, offpeak_window=offpeak_window)
+        if args.pregenerate:
+            generator.refill_queue(force=args.ignore_window)
+        else:
+            # False when generation failed, e.g. a replayed request missing from the cassette
+            return 0 if generator.run_daily_generation() else 1
         return 0
     except Exception as e:
         print(f"[ERROR] {e}")